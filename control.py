@@ -58,6 +58,10 @@ class PedestrianController:
         self.sim_running=True
         self.end_on_reached_targets = end_on_reached_targets
         self.finishing_times = []
+
+        # Pedestrians influence the cost of cells up to r_max, tiles are only used during an update
+        self.r_max = 2
+        self.tiles = None
         
         # Varaibles used to measure the density of areas
         self.areas = []
@@ -100,6 +104,9 @@ class PedestrianController:
     """
     def _update(self):
         remove_pedestrians = []
+        self.tiles = PedestrianTiles(self.r_max)
+        for p in self.pedestrians:
+            self.tiles.add(p)
         for p in self.pedestrians:
             # checks if pedestrian passed a measuring point used for task 5 test 2
             if not self.passed_point and p.cell.loc[0] in [pt.cell.loc[0] for pt in self.points]:
@@ -111,13 +118,16 @@ class PedestrianController:
             # loops pedestrians to the left if density is being calculated used for task 3 test 2
             if self.with_density and p.cell.loc[0] in [t.cell.loc[0]-2 for t in self.targets]:
                 self.pedestrians.append(Pedestrian(self.field.cells[1, p.cell.loc[1]], p.speed, p.steps_left, p.identity))
+                self.tiles.add(self.pedestrians[-1])
                 remove_pedestrians.append(p)
 
              #Find and move to the neighbor with the lowest cost function
 
             if not p.cell in [t.cell for t in self.targets]:
                 optimal_neighbor = self.find_optimal_neighbor(p)
+                previous_cell = p.cell
                 p.move_in_time(optimal_neighbor)
+                self.tiles.move(p, previous_cell)
                 # devour pedestrians who have reached a target and print the elapsed time for individual peds
                 if p.cell in [t.cell for t in self.targets]:
                     finishing_time = time.time() - p.first_movement_timestamp
@@ -125,6 +135,7 @@ class PedestrianController:
                     self.finishing_times.append(finishing_time)
                     if self.devour:
                         remove_pedestrians.append(p)
+        self.tiles = None
         # remove pedestrians if necessary
         if len(remove_pedestrians) > 0:
             self.pedestrians = [p for p in self.pedestrians if p not in remove_pedestrians]
@@ -163,14 +174,123 @@ class PedestrianController:
             coordinates.append(a.coordinates)
         return coordinates
 
+    """
+    Writes a compressed binary snapshot of the full simulation state.
+    Timestamps are stored relative to the moment of saving, so a restored simulation continues as if it was never paused.
+
+    @param filename: File to write the snapshot to (numpy .npz format, the extension is appended if missing).
+    """
+    def save_checkpoint(self, filename):
+        now = time.time()
+
+        # pedestrians referenced by the controller or by any area, each stored once
+        pool = list(self.pedestrians)
+        for a in self.areas:
+            for p in a.pedestrians:
+                if not any(p is q for q in pool):
+                    pool.append(p)
+        index = {id(p): i for i, p in enumerate(pool)}
+
+        def locs(objects):
+            return np.array([o.cell.loc for o in objects], dtype=np.int64).reshape(-1, 2)
+
+        def offsets(lists):
+            return np.cumsum([0] + [len(l) for l in lists], dtype=np.int64)
+
+        next_timestamps = [np.nan if p.next_movement_timestamp is None else p.next_movement_timestamp - now for p in pool]
+
+        np.savez_compressed(filename,
+            dims=np.array([self.field.width, self.field.height], dtype=np.int64),
+            flags=np.array([self.devour, self.dijkstra, self.sim_running, self.end_on_reached_targets, self.with_density, self.passed_point]),
+            speed=np.array(self.speed, dtype=np.float64),
+            max_timesteps=np.array(self.max_timesteps, dtype=np.int64),
+            start_time=np.array(self.start_time - now, dtype=np.float64),
+            finishing_times=np.array(self.finishing_times, dtype=np.float64),
+            static_cost=np.array([[c.static_cost for c in row] for row in self.field.cells], dtype=np.float64),
+            targets=locs(self.targets),
+            obstacles=locs(self.obstacles),
+            points=locs(self.points),
+            ped_locs=locs(pool),
+            ped_speed=np.array([p.speed for p in pool], dtype=np.float64),
+            ped_steps_left=np.array([p.steps_left for p in pool], dtype=np.int64),
+            ped_identity=np.array([p.identity for p in pool], dtype=np.int64),
+            ped_timestamps=np.array([[p.last_movement_timestamp - now, p.first_movement_timestamp - now, t,
+                p.enter_time - now, p.exit_time - now] for p, t in zip(pool, next_timestamps)], dtype=np.float64).reshape(-1, 5),
+            active=np.arange(len(self.pedestrians), dtype=np.int64),
+            area_corners=np.array([[a.top_left.loc, a.bottom_right.loc] for a in self.areas], dtype=np.int64).reshape(-1, 2, 2),
+            area_members=np.array([index[id(p)] for a in self.areas for p in a.pedestrians], dtype=np.int64),
+            area_members_offsets=offsets([a.pedestrians for a in self.areas]),
+            area_density=np.array([a.density for a in self.areas], dtype=np.float64),
+            area_coordinates=np.array([c for a in self.areas for c in a.coordinates], dtype=np.float64).reshape(-1, 2),
+            area_coordinates_offsets=offsets([a.coordinates for a in self.areas]))
+
+    """
+    Creates a controller from a snapshot written by save_checkpoint().
+    Static costs are restored as well, so init_costs() must not be called again.
+    Restoring the same snapshot multiple times forks independent simulations from one state.
+
+    @param filename: File to read the snapshot from.
+    @param verbose_visualization: Whether to visualize the static costs.
+    @param visualization: Whether to visualize the restored simulation.
+    @return: PedestrianController continuing from the saved state.
+    """
+    @staticmethod
+    def load_checkpoint(filename, verbose_visualization=False, visualization=False):
+        with np.load(filename) as data:
+            state = {key: data[key] for key in data.files}
+        now = time.time()
+
+        width, height = (int(v) for v in state['dims'])
+        devour, dijkstra, sim_running, end_on_reached_targets, with_density, passed_point = (bool(v) for v in state['flags'])
+
+        def locs(key):
+            return [tuple(int(v) for v in loc) for loc in state[key]] or None
+
+        controller = PedestrianController(width, height, None, locs('targets'), locs('obstacles'), locs('points'),
+            [float(state['speed'])], int(state['max_timesteps']), devour, dijkstra, verbose_visualization, visualization, end_on_reached_targets)
+
+        for row, costs in zip(controller.field.cells, state['static_cost']):
+            for cell, cost in zip(row, costs):
+                cell.static_cost = cost
+
+        pool = []
+        for (x, y), speed, steps_left, identity, timestamps in zip(state['ped_locs'], state['ped_speed'],
+                state['ped_steps_left'], state['ped_identity'], state['ped_timestamps']):
+            p = Pedestrian(controller.field.cells[x, y], float(speed), int(steps_left), int(identity))
+            last_movement, first_movement, next_movement, enter_time, exit_time = (float(t) + now for t in timestamps)
+            p.last_movement_timestamp = last_movement
+            p.first_movement_timestamp = first_movement
+            p.next_movement_timestamp = None if np.isnan(next_movement) else next_movement
+            p.enter_time = enter_time
+            p.exit_time = exit_time
+            pool.append(p)
+        controller.pedestrians = [pool[i] for i in state['active']]
+
+        members, members_offsets = state['area_members'], state['area_members_offsets']
+        coordinates, coordinates_offsets = state['area_coordinates'], state['area_coordinates_offsets']
+        controller.set_areas([tuple(tuple(int(v) for v in corner) for corner in corners) for corners in state['area_corners']])
+        for i, a in enumerate(controller.areas):
+            a.pedestrians = [pool[j] for j in members[members_offsets[i]:members_offsets[i+1]]]
+            a.density = float(state['area_density'][i])
+            a.coordinates = coordinates[coordinates_offsets[i]:coordinates_offsets[i+1]].tolist()
+
+        controller.sim_running = sim_running
+        controller.with_density = with_density
+        controller.passed_point = passed_point
+        controller.start_time = float(state['start_time']) + now
+        controller.finishing_times = state['finishing_times'].tolist()
+        return controller
+
     """
     Find the neighboring cell for pedestrian p with the lowest calculated cost-functions.
     Takes int account all costs including other pedestrian locations.
+    During an update only pedestrians in the surrounding tiles are considered, since others are too far away to influence the costs.
 
     @param pedestrian: Pedestrian to find optimal neighbor-cell for next movement.
     """
     def find_optimal_neighbor(self, pedestrian):
-        avail_neighbor_pedestrian_costs = pedestrian.calc_pedestrian_cost(self.pedestrians)
+        nearby_pedestrians = self.pedestrians if self.tiles is None else self.tiles.nearby(pedestrian.cell)
+        avail_neighbor_pedestrian_costs = pedestrian.calc_pedestrian_cost(nearby_pedestrians, self.r_max)
         min_neighbor_cost = None
         optimal_neighbor = None
         for i, neighbor in enumerate(pedestrian.cell.get_avail_neighbors()):
@@ -71,3 +71,61 @@ class Field:
             for y in range(1, self.height-1):
                 self.cells[x, y].neighbors = [self.cells[x, y-1], self.cells[x+1, y-1], self.cells[x+1, y], self.cells[x+1, y+1], 
                 self.cells[x, y+1], self.cells[x-1, y+1], self.cells[x-1, y], self.cells[x-1, y-1]]
+
+"""
+Splits a Field into square tiles and keeps track of which pedestrians are located in which tile.
+Used to find the pedestrians close to a cell without iterating over all pedestrians.
+"""
+class PedestrianTiles:
+
+    """
+    Initializes empty tiles large enough so that every pedestrian influencing the neighbors of a cell lies in the surrounding tiles.
+
+    @param r_max: Distance up to which pedestrians influence the cost of cells.
+    """
+    def __init__(self, r_max):
+        self.tile_size = int(np.ceil(r_max)) + 1
+        self.tiles = {}
+        self.order = {}
+
+    """
+    Returns the tile-key for a location.
+
+    @param loc: (x, y) location of a cell.
+    """
+    def key(self, loc):
+        return (loc[0] // self.tile_size, loc[1] // self.tile_size)
+
+    """
+    Adds a pedestrian to the tile of its current cell.
+    Pedestrians keep the order in which they were added, so costs are summed up in the same order as over the list of all pedestrians.
+
+    @param pedestrian: Pedestrian to add.
+    """
+    def add(self, pedestrian):
+        self.order[id(pedestrian)] = len(self.order)
+        self.tiles.setdefault(self.key(pedestrian.cell.loc), []).append(pedestrian)
+
+    """
+    Moves a pedestrian to the tile of its current cell.
+
+    @param pedestrian: Pedestrian which has moved.
+    @param previous_cell: Cell the pedestrian was located on before moving.
+    """
+    def move(self, pedestrian, previous_cell):
+        previous_key = self.key(previous_cell.loc)
+        current_key = self.key(pedestrian.cell.loc)
+        if previous_key != current_key:
+            self.tiles[previous_key].remove(pedestrian)
+            self.tiles.setdefault(current_key, []).append(pedestrian)
+
+    """
+    Returns all pedestrians in the tile of the given cell and its surrounding tiles.
+
+    @param cell: Cell to find nearby pedestrians for.
+    @return: Nearby pedestrians in the order they were added.
+    """
+    def nearby(self, cell):
+        tile_x, tile_y = self.key(cell.loc)
+        pedestrians = [p for x in range(tile_x-1, tile_x+2) for y in range(tile_y-1, tile_y+2) for p in self.tiles.get((x, y), [])]
+        return sorted(pedestrians, key=lambda p: self.order[id(p)])